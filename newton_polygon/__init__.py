@@ -1 +1,2 @@
-from newton_polygon.polygon import *
\ No newline at end of file
+from newton_polygon.polygon import *
+from newton_polygon.polyhedron import *
@@ -1,7 +1,20 @@
+import atexit
+import csv
+import io
+import itertools
+import json
+import math
+import sys
+import threading
+import time
+from collections import deque
+from concurrent import futures
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 from wolframclient.evaluation import WolframLanguageSession
-from wolframclient.language.expression import WLFunction
+from wolframclient.language import wl, wlexpr
+from wolframclient.language.expression import WLFunction, WLSymbol
 
 
 def _patched(self):
@@ -13,6 +26,28 @@ def _patched(self):
 
 WLFunction.__repr__ = _patched
 
+_WRITE_BUFFER_SIZE = 1 << 16
+
+
+def _write_chunks(stream, chunks, buffer_size=_WRITE_BUFFER_SIZE):
+    """!
+    Write string chunks to a file object, joining them into blocks of about buffer_size characters.
+    @param stream file object with write method
+    @param chunks iterable of str objects
+    @param buffer_size int
+    """
+    block = []
+    size = 0
+    for chunk in chunks:
+        block.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            stream.write(''.join(block))
+            block = []
+            size = 0
+    if block:
+        stream.write(''.join(block))
+
 
 class Fraction:
     """!
@@ -44,15 +79,9 @@ class Fraction:
         @param b int
         @return gcd int
         """
-        if a == 0:
-            return b
-        if b == 0:
-            return a
-        if a == b:
-            return a
-        if a > b:
-            return self.gcd(a - b, b)
-        return self.gcd(a, b - a)
+        while b:
+            a, b = b, a % b
+        return a
 
     def simplifyFraction(self, a, b):
         """!
@@ -116,6 +145,13 @@ class Fraction:
             return True
         return False
 
+    def __hash__(self):
+        """!
+        Basic hash method, consistent with equality.
+        @return res int
+        """
+        return hash((self.a, self.b))
+
 
 def alphabetic(string: str):
     """!
@@ -134,13 +170,15 @@ class Factor:
     Class for handling basic factors inside a monomial.
     """
 
-    def __init__(self, name: str, power: Fraction, der_ord=0, der_by=None):
+    def __init__(self, name: str, power: Fraction, der_ord=0, der_by=None, args=None):
         """!
-        Factor class initializer.
+        Factor class initializer. For a function of several variables args holds its arguments, and der_by lists
+        each variable as many times as the function is derived by it, e.g. args='t,x', der_ord=3, der_by='t,x,x'.
         @param name str
         @param power Fraction
         @param der_ord int
         @param der_by str
+        @param args str comma separated arguments or None
         """
         if der_ord < 0 or type(der_ord) != int:
             raise ValueError("Passed Derivative order is not valid")
@@ -153,11 +191,23 @@ class Factor:
         if der_by is not None:
             if type(der_by) != str:
                 raise ValueError("Passed derived by is not a string")
-            if der_by == name:
+            if name in der_by.split(','):
                 raise ValueError("The function is derived by itself")
             self.der_by = der_by
         else:
             self.der_by = ''
+        if args is not None:
+            if type(args) != str:
+                raise ValueError("Passed arguments are not a string")
+            variables = self.der_by.split(',') if self.der_by else []
+            if len(variables) != der_ord:
+                raise ValueError("Passed derivative order does not match derived by parameter")
+            for variable in variables:
+                if variable not in args.split(','):
+                    raise ValueError("Passed derived by is not an argument of the function")
+        elif ',' in self.der_by and der_ord != 0:
+            raise ValueError("Missed arguments of the function")
+        self.args = args
         if type(power) not in [int, Fraction]:
             raise ValueError("Passed power is invalid")
         if type(power) != Fraction:
@@ -173,16 +223,34 @@ class Factor:
         string = self.name
         if self.power.a == 0:
             return ' '
-        if self.der_ord != 0:
-            for i in range(self.der_ord):
-                string += "'"
-        if self.der_by != '':
-            string += f"[{self.der_by}]"
+        if self.args is not None:
+            string += f"[{self.args}]"
+            if self.der_ord != 0:
+                string += f"_{{{self.der_by}}}"
+        else:
+            if self.der_ord != 0:
+                string += "'" * self.der_ord
+            if self.der_by != '':
+                string += f"[{self.der_by}]"
         if self.power.a != 1 or self.power.b != 1:
             string += f"^({str(self.power)})"
 
         return string
 
+    def get_orders(self):
+        """!
+        Get derivative orders by each variable.
+        @return res dict of str to int
+        """
+        if self.der_ord == 0:
+            return {}
+        if self.args is None:
+            return {self.der_by: self.der_ord}
+        orders = {}
+        for variable in self.der_by.split(','):
+            orders[variable] = orders.get(variable, 0) + 1
+        return orders
+
 
 class Monomial:
     """!
@@ -199,19 +267,29 @@ class Monomial:
                 raise ValueError("Passed factor list is not valid")
         self.factor_list = self.sort(factor_list)
 
-    def __str__(self):
+    def iter_str(self):
         """!
-        Conver to string method.
-        @return string str
+        Iterate over string representations of the factors, each prefixed with a space.
+        @return generator of str objects
         """
-        string = ''
         for factor in self.factor_list:
             s = factor.__str__()
             if s != ' ':
-                string += ' '
-                string += s
+                yield ' ' + s
 
-        return string
+    def write_to(self, stream):
+        """!
+        Write monomial to a file object.
+        @param stream file object with write method
+        """
+        _write_chunks(stream, self.iter_str())
+
+    def __str__(self):
+        """!
+        Conver to string method.
+        @return string str
+        """
+        return ''.join(self.iter_str())
 
     @staticmethod
     def sort(factor_list):
@@ -253,31 +331,357 @@ class Monomial:
         y = Fraction(0)
         for factor in self.factor_list:
             if factor.name == func:
-                if factor.der_by == arg:
-                    x = x - Fraction(factor.der_ord) * factor.power
+                x = x - Fraction(factor.get_orders().get(arg, 0)) * factor.power
                 y = y + factor.power
             if factor.name == arg and factor.der_by == '':
                 x = x + factor.power
         return x, y
 
+    def get_vector(self, funcs: list, args: list):
+        """!
+        Get a point used to initialize Newton Polyhedron for several functions and arguments. The coordinates are
+        the exponents of the arguments followed by the powers of the functions, so that get_vector([func], [arg])
+        is equal to get_point(func, arg).
+        @param funcs list of str
+        @param args list of str
+        @return vector tuple of Fraction objects
+        """
+        for name in list(funcs) + list(args):
+            if type(name) != str:
+                raise ValueError("Passed function or argument is not a string")
+            if not alphabetic(name):
+                raise ValueError("Passed function or argument is not alphabetic")
+        if len(set(funcs) | set(args)) != len(funcs) + len(args):
+            raise ValueError("Passed functions and arguments are not distinct")
+
+        arg_index = {arg: i for i, arg in enumerate(args)}
+        func_index = {func: len(args) + i for i, func in enumerate(funcs)}
+        vector = [Fraction(0)] * (len(args) + len(funcs))
+        for factor in self.factor_list:
+            if factor.name in func_index:
+                i = func_index[factor.name]
+                vector[i] = vector[i] + factor.power
+                for variable, order in factor.get_orders().items():
+                    if variable in arg_index:
+                        j = arg_index[variable]
+                        vector[j] = vector[j] - Fraction(order) * factor.power
+            elif factor.name in arg_index and factor.der_by == '':
+                i = arg_index[factor.name]
+                vector[i] = vector[i] + factor.power
+        return tuple(vector)
+
+
+class KernelTimeoutError(TimeoutError):
+    """!
+    Error raised when a kernel evaluation does not finish before its deadline.
+    """
+
+    def __init__(self, operation: str, timeout: float, recycled: bool):
+        """!
+        KernelTimeoutError initializer.
+        @param operation str name of the timed out operation
+        @param timeout float time budget of the evaluation in seconds
+        @param recycled bool whether the kernel process was killed
+        """
+        super().__init__(f'Kernel operation {operation} exceeded its deadline of {timeout:.3f}s')
+        self.operation = operation
+        self.timeout = timeout
+        self.recycled = recycled
+
+
+# Failure value of TimeConstrained, private so that no expression can evaluate to it by itself.
+_TIMED_OUT = 'NewtonPolygon`Private`$TimedOut'
+
+# Global` symbols that have any definition attached.
+_DEFINED_SYMBOLS = ('Select[Names["Global`*"], Function[name, ToExpression[name, InputForm, '
+                    'Function[s, OwnValues[s] =!= {} || DownValues[s] =!= {} || UpValues[s] =!= {} || '
+                    'SubValues[s] =!= {}, HoldAll]]]]')
+
+# Evaluates its held argument and clears the definitions it made on previously undefined Global` symbols,
+# so that one kernel can be shared by expressions which used to get a fresh session each.
+_SCOPED_EVALUATION = (f'Function[expr, With[{{before = {_DEFINED_SYMBOLS}}}, With[{{res = expr}}, '
+                      f'ClearAll @@ Complement[{_DEFINED_SYMBOLS}, before]; res]], HoldAll]')
+
+
+def _deadline(timeout=None, deadline=None):
+    """!
+    Combine a relative timeout and an absolute deadline into the earliest deadline.
+    @param timeout float seconds or None
+    @param deadline float time.monotonic() value or None
+    @return deadline float or None
+    """
+    if timeout is not None:
+        if timeout < 0:
+            raise ValueError("Passed timeout is negative")
+        timeout = time.monotonic() + timeout
+        if deadline is None or timeout < deadline:
+            return timeout
+    return deadline
+
+
+def _kill(session):
+    """!
+    Terminate a kernel session, ignoring errors of an already dead process.
+    @param session WolframLanguageSession
+    """
+    try:
+        session.terminate()
+    except Exception:
+        # The process may be already dead, there is nothing else to clean up.
+        pass
+
+
+class Kernel:
+    """!
+    Reusable Wolfram kernel with deadline-aware evaluation and latency statistics.
+    """
+
+    def __init__(self, kernel_path=None, grace=1.0, history=10000, session_class=None):
+        """!
+        Kernel initializer. The kernel process is started on the first evaluation.
+        @param kernel_path str path to the WolframKernel executable, None for the default one
+        @param grace float seconds to wait for the kernel to abort by itself before killing it
+        @param history int number of latency samples kept per operation
+        @param session_class class used to create sessions, WolframLanguageSession if None
+        """
+        self.kernel_path = kernel_path
+        self._session_class = session_class if session_class is not None else WolframLanguageSession
+        self.grace = grace
+        self.latencies = {}
+        self._history = history
+        self._session = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+    def _start(self, timeout=None):
+        """!
+        Start the kernel process if it is not running.
+        @param timeout float seconds to wait for the start or None
+        @return session WolframLanguageSession
+        """
+        if self._session is None:
+            session = self._session_class(self.kernel_path)
+            try:
+                session.start(block=True, timeout=timeout)
+            except BaseException:
+                _kill(session)
+                raise
+            self._session = session
+        return self._session
+
+    def terminate(self):
+        """!
+        Kill the kernel process. A new one is spawned by the next evaluation.
+        """
+        session, self._session = self._session, None
+        if session is not None:
+            _kill(session)
+
+    def _record(self, operation, elapsed):
+        """!
+        Record latency of an operation.
+        @param operation str
+        @param elapsed float seconds
+        """
+        with self._stats_lock:
+            if operation not in self.latencies:
+                self.latencies[operation] = deque(maxlen=self._history)
+            self.latencies[operation].append(elapsed)
+
+    def evaluate(self, expr, operation='evaluate', timeout=None, deadline=None, scoped=False):
+        """!
+        Evaluate an expression. When a timeout or a deadline is given, the kernel start and the evaluation are
+        bounded by it: the evaluation is wrapped in TimeConstrained, and if the kernel does not return within
+        the grace period after the deadline, its process is killed.
+        @param expr str or wolfram expression
+        @param operation str name used for latency statistics
+        @param timeout float seconds or None
+        @param deadline float time.monotonic() value or None
+        @param scoped bool clear definitions made by the expression on previously undefined Global` symbols
+        @return res wolfram expression
+
+        >>> class FakeSession:
+        ...     started = 0
+        ...     result = None
+        ...     def __init__(self, kernel_path):
+        ...         FakeSession.started += 1
+        ...     def start(self, block=True, timeout=None):
+        ...         pass
+        ...     def evaluate_future(self, expr):
+        ...         future = futures.Future()
+        ...         if self.result is not None:
+        ...             future.set_result(self.result)
+        ...         return future
+        ...     def terminate(self):
+        ...         pass
+        >>> kernel = Kernel(grace=0.01, session_class=FakeSession)
+        >>> try:
+        ...     kernel.evaluate('Pause[10]', timeout=0.01)
+        ... except KernelTimeoutError as error:
+        ...     print(error.recycled, kernel._session is None)
+        True True
+        >>> FakeSession.result = WLSymbol(_TIMED_OUT)
+        >>> try:
+        ...     kernel.evaluate('Pause[10]', timeout=0.01)
+        ... except KernelTimeoutError as error:
+        ...     print(error.recycled, FakeSession.started, kernel._session is not None)
+        False 2 True
+        >>> FakeSession.result = WLSymbol('$Aborted')
+        >>> kernel.evaluate('Abort[]', timeout=1).name
+        '$Aborted'
+        >>> with kernel._lock:
+        ...     try:
+        ...         kernel.evaluate('1', timeout=0.01)
+        ...     except KernelTimeoutError as error:
+        ...         print(error.recycled)
+        False
+        >>> def start(self, block=True, timeout=None):
+        ...     raise futures.TimeoutError()
+        >>> FakeSession.start = start
+        >>> kernel.terminate()
+        >>> try:
+        ...     kernel.evaluate('1', timeout=1)
+        ... except KernelTimeoutError as error:
+        ...     print(error.recycled, FakeSession.started, kernel._session is None)
+        True 3 True
+        >>> sorted(kernel.latencies)
+        ['evaluate']
+        """
+        start = time.monotonic()
+        deadline = _deadline(timeout, deadline)
+        if type(expr) == str:
+            expr = wlexpr(expr)
+        try:
+            if deadline is None:
+                with self._lock:
+                    if scoped:
+                        expr = WLFunction(wlexpr(_SCOPED_EVALUATION), expr)
+                    return self._evaluate(self._start().evaluate, expr)
+            budget = deadline - start
+            if budget <= 0 or not self._lock.acquire(timeout=budget):
+                raise KernelTimeoutError(operation, budget, False)
+            try:
+                try:
+                    session = self._start(deadline - time.monotonic())
+                except (futures.TimeoutError, TimeoutError):
+                    raise KernelTimeoutError(operation, budget, True)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise KernelTimeoutError(operation, budget, False)
+                expr = wl.TimeConstrained(expr, remaining, wl.Symbol(_TIMED_OUT))
+                if scoped:
+                    expr = WLFunction(wlexpr(_SCOPED_EVALUATION), expr)
+                future = self._evaluate(session.evaluate_future, expr)
+                try:
+                    res = future.result(timeout=remaining + self.grace)
+                except futures.TimeoutError:
+                    self.terminate()
+                    raise KernelTimeoutError(operation, budget, True)
+                if isinstance(res, WLSymbol) and res.name == _TIMED_OUT:
+                    raise KernelTimeoutError(operation, budget, False)
+                return res
+            finally:
+                self._lock.release()
+        finally:
+            self._record(operation, time.monotonic() - start)
+
+    def _evaluate(self, method, expr):
+        """!
+        Call an evaluation method of the session, killing the kernel if the call fails.
+        @param method bound method of WolframLanguageSession
+        @param expr wolfram expression
+        @return res
+        """
+        try:
+            return method(expr)
+        except Exception:
+            self.terminate()
+            raise
+
+    def _samples(self, operation):
+        """!
+        Get a sorted copy of the recorded latencies of an operation.
+        @param operation str
+        @return res list of float
+        """
+        with self._stats_lock:
+            samples = list(self.latencies.get(operation, ()))
+        return sorted(samples)
+
+    @staticmethod
+    def _percentile(samples, q):
+        """!
+        Nearest-rank percentile of sorted samples.
+        @param samples list of float
+        @param q float percentile from 0 to 100
+        @return res float or None if there are no samples
+        """
+        if q < 0 or q > 100:
+            raise ValueError("Passed percentile is out of range")
+        if not samples:
+            return None
+        return samples[max(math.ceil(q / 100 * len(samples)) - 1, 0)]
+
+    def latency_percentile(self, operation: str, q):
+        """!
+        Get latency percentile of an operation using the nearest-rank method.
+        @param operation str
+        @param q float percentile from 0 to 100
+        @return res float seconds or None if the operation was never recorded
+        """
+        return self._percentile(self._samples(operation), q)
+
+    def latency_summary(self, percentiles=(50, 90, 99)):
+        """!
+        Get latency percentiles of every recorded operation.
+        @param percentiles tuple of float
+        @return res dict of operation name to dict of percentile to seconds
+        """
+        with self._stats_lock:
+            operations = list(self.latencies)
+        res = {}
+        for operation in operations:
+            samples = self._samples(operation)
+            res[operation] = {q: self._percentile(samples, q) for q in percentiles}
+        return res
+
+
+_default_kernel = None
+_default_kernel_lock = threading.Lock()
+
+
+def default_kernel():
+    """!
+    Get the kernel shared by expressions created without an explicit kernel.
+    @return kernel Kernel
+    """
+    global _default_kernel
+    with _default_kernel_lock:
+        if _default_kernel is None:
+            _default_kernel = Kernel()
+            atexit.register(_default_kernel.terminate)
+        return _default_kernel
+
 
 class WolframExpression:
     """!
     Class for basic for handling basic Wolfram expressions.
     """
 
-    def __init__(self, wolfram_expr: str):
+    def __init__(self, wolfram_expr: str, timeout=None, deadline=None, kernel=None):
         """!
         WolframExpression initializer.
         @param wolfram_expr str
+        @param timeout float seconds or None
+        @param deadline float time.monotonic() value or None
+        @param kernel Kernel, the shared default kernel if None
         """
-        self.__session = WolframLanguageSession()
+        self.kernel = kernel if kernel is not None else default_kernel()
         if type(wolfram_expr) != str:
             ValueError("The given wolfram expression is not a string.")
-        self.wolfram_expr = str(self.__session.evaluate(wolfram_expr))
+        self.wolfram_expr = str(self.kernel.evaluate(wolfram_expr, 'parse', timeout, deadline, scoped=True))
         if self.wolfram_expr == '':
             ValueError("The given wolfram expression is empty.")
-        self.__session.terminate()
 
         self.funcs = []
         self.args = []
@@ -291,12 +695,7 @@ class WolframExpression:
         """
         if not len(args):
             return ''
-        res = '('
-        for i in range(0, len(args) - 1):
-            res += args[i] + ' + '
-        res += args[-1]
-        res += ')'
-        return res
+        return '(' + ' + '.join(args) + ')'
 
     @staticmethod
     def _times_str(args: list):
@@ -305,13 +704,7 @@ class WolframExpression:
         @params list of str objects
         @return res str
         """
-        res = ''
-        if not len(args):
-            return ''
-        for i in range(0, len(args) - 1):
-            res += args[i] + ' '
-        res += args[-1]
-        return res
+        return ' '.join(args)
 
     @staticmethod
     def _derivative_str(args: list):
@@ -322,7 +715,15 @@ class WolframExpression:
         """
         if len(args) < 3:
             return ''
-        return args[1] + "'" * int(args[0]) + f'[{args[2]}]'
+        orders = [int(order) for order in args[0].split(',')]
+        variables = [variable.strip().replace('Global`', '') for variable in args[2].split(',')]
+        if len(variables) == 1:
+            return args[1] + "'" * orders[0] + f'[{variables[0]}]'
+        # Functions of several variables keep their arguments, the derivation variables follow in braces.
+        res = f'{args[1]}[{",".join(variables)}]'
+        if any(orders):
+            res += '_{' + ','.join(v for order, v in zip(orders, variables) for _ in range(order)) + '}'
+        return res
 
     @staticmethod
     def _power_str(args: list):
@@ -355,7 +756,8 @@ class WolframExpression:
         """
         if not len(args):
             return ''
-        return f'{f}[{args[0]}]'
+        # Arguments are joined without spaces, since monomials are split into factors by spaces.
+        return f'{f}[{",".join(args)}]'
 
 
 class Polynomial(WolframExpression):
@@ -363,16 +765,20 @@ class Polynomial(WolframExpression):
        Basic class for handling differential polynomials initialized by wolfram expression.
     """
 
-    def __init__(self, wolfram_expr: str):
+    def __init__(self, wolfram_expr: str, timeout=None, deadline=None, kernel=None):
         """!
         Polynomial initializer
         @param wolfram_expr str
+        @param timeout float seconds or None
+        @param deadline float time.monotonic() value or None
+        @param kernel Kernel, the shared default kernel if None
         """
-        super().__init__(wolfram_expr)
+        super().__init__(wolfram_expr, timeout, deadline, kernel)
         if self.wolfram_expr[:4] != 'Plus':
             self.wolfram_expr = 'Plus[' + self.wolfram_expr + ']'
         self.monomial_list = []
         self.__factor_list = []
+        self._terms = []
         self._py_expr, self.args = self._get(self.wolfram_expr)
 
     @staticmethod
@@ -384,6 +790,16 @@ class Polynomial(WolframExpression):
         @return power Fraction
         @return der_ord int
         @return der_by str
+        @return args str or None
+
+        >>> name, power, der_ord, der_by, args = Polynomial._parse_factor("t^(1/2)")
+        >>> name, str(power), der_ord, der_by, args
+        ('t', '1/2', 0, '', None)
+        >>> Polynomial._parse_factor("y''[x]")[2:]
+        (2, 'x', None)
+        >>> name, power, der_ord, der_by, args = Polynomial._parse_factor("u[t,x]_{t,x,x}^(-1/3)")
+        >>> name, str(power), der_ord, der_by, args
+        ('u', '-1/3', 3, 't,x,x', 't,x')
         """
         if type(factor) != str:
             ValueError("Passed factor is not a string.")
@@ -391,13 +807,15 @@ class Polynomial(WolframExpression):
         power_a = '1'
         power_b = '1'
         der_by = ''
+        der_vars = None
         der_ord = 0
         flag_name = 1
         flag_der_by = 0
+        flag_der_vars = 0
         flag_power = 0
         flag_b = 0
         for s in factor:
-            if s in ['[', ']', '^', "'", '(', ')', '/']:
+            if s in ['[', ']', '^', "'", '(', ')', '/', '_', '{', '}']:
                 flag_name = 0
                 if s == "'":
                     der_ord += 1
@@ -407,13 +825,20 @@ class Polynomial(WolframExpression):
                 elif s == ']':
                     flag_der_by = 0
                     continue
+                elif s == '{':
+                    der_vars = ''
+                    flag_der_vars = 1
+                    continue
+                elif s == '}':
+                    flag_der_vars = 0
+                    continue
                 elif s == '^':
                     power_a = ''
                     flag_power = 1
                     continue
                 elif s == '/' and flag_power:
                     power_b = ''
-                    flab_b = 1
+                    flag_b = 1
                     continue
                 else:
                     continue
@@ -424,10 +849,16 @@ class Polynomial(WolframExpression):
                     power_b += s
             if flag_der_by:
                 der_by += s
+            if flag_der_vars:
+                der_vars += s
             if flag_name:
                 name += s
         power = Fraction(int(power_a), int(power_b))
-        return name, power, der_ord, der_by
+        if der_vars is not None:
+            return name, power, len(der_vars.split(',')) if der_vars else 0, der_vars, der_by
+        if ',' in der_by:
+            return name, power, 0, '', der_by
+        return name, power, der_ord, der_by, None
 
     def _factorize(self, monomial: str):
         """!
@@ -438,8 +869,8 @@ class Polynomial(WolframExpression):
         for factor in monomial.split(' '):
             if type(monomial) != str:
                 ValueError("Passed monomial is not a string.")
-            name, power, der_ord, der_by = self._parse_factor(factor)
-            self.__factor_list.append(Factor(name, power, der_ord, der_by))
+            name, power, der_ord, der_by, args = self._parse_factor(factor)
+            self.__factor_list.append(Factor(name, power, der_ord, der_by, args))
 
     def _monomialize(self, monomials: list):
         """!
@@ -465,6 +896,8 @@ class Polynomial(WolframExpression):
             ValueError("Passed function name is not a string.")
         if f == 'Plus':
             self._monomialize(args)
+            # The outermost Plus is combined last, so its terms are the ones kept.
+            self._terms = args
             return self._plus_str(args)
         if f == 'Derivative':
             return self._derivative_str(args)
@@ -544,37 +977,31 @@ class Polynomial(WolframExpression):
 
         return py_expr, args
 
-    @staticmethod
-    def _alter_py_expr(string):
-        """!
-        Method that alters py_expr of polynomial and makes it more user friendly.
-        @param string str
-        @return better str
-        """
-        if type(string) != str:
-            ValueError("Passed argument list is not valid.")
-        better = ''
-        it = iter(range(len(string) - 2))
-        for i in it:
-            if string[i: i + 3] == '+ -':
-                better += '- '
-                next(it)
-                next(it)
-                continue
-            better += string[i]
-        better += string[-2:]
-        if better[0] == '(' and better[-1] == ')':
-            better = better[1:-1]
-        if better[0] == '-':
-            better = '- ' + better[1:]
-        return better
+    def iter_str(self):
+        """!
+        Iterate over the user friendly representation of polynomial term by term.
+        @return generator of str objects
+        """
+        for i, term in enumerate(self._terms):
+            term = term.replace('+ -', '- ')
+            if term[:1] == '-':
+                yield ('- ' if i == 0 else ' - ') + term[1:]
+            else:
+                yield term if i == 0 else ' + ' + term
+
+    def write_to(self, stream):
+        """!
+        Write polynomial to a file object.
+        @param stream file object with write method
+        """
+        _write_chunks(stream, self.iter_str())
 
     def __str__(self):
         """!
         Converts polynomial to string.
         @return res str
         """
-        return self._alter_py_expr(self._py_expr)
+        return ''.join(self.iter_str())
 
 
 class NewtonPolygon(Polynomial):
@@ -582,15 +1009,18 @@ class NewtonPolygon(Polynomial):
     Class for handling basic Newton Polygons for differential polynomials.
     """
 
-    def __init__(self, wolfram_expr: str, func: str, arg: str):
+    def __init__(self, wolfram_expr: str, func: str, arg: str, timeout=None, deadline=None, kernel=None):
         """!
         Newton Polygon initializer.
         @param func str
         @param arg str
         @param wolfram_expr str
+        @param timeout float seconds or None
+        @param deadline float time.monotonic() value or None
+        @param kernel Kernel, the shared default kernel if None
         @return res NewtonPolygon
         """
-        super().__init__(wolfram_expr)
+        super().__init__(wolfram_expr, timeout, deadline, kernel)
         if type(func) != str:
             ValueError("Passed function name is not a string.")
         if type(arg) != str:
@@ -612,19 +1042,22 @@ class NewtonPolygon(Polynomial):
             if flag:
                 self._points.append([point[0], point[1], [monomial]])
 
-    def replacement(self, wolfram_expr, func: str, arg: str):
+    def replacement(self, wolfram_expr, func: str, arg: str, timeout=None, deadline=None):
         """!
         Allows user to input replacement using wolfram language function definition of u[t]:= y[t] + c/t^-1
         @param wolfram_expr str
         @param func str
         @param arg str
+        @param timeout float seconds or None, shared by the expansion and the new polygon parsing
+        @param deadline float time.monotonic() value or None
         @return res NewtonPolygon
         """
-        session = WolframLanguageSession()
-        session.evaluate(wolfram_expr)
-        new = session.evaluate(f'Expand[{self.wolfram_expr}]')
-        session.terminate()
-        return NewtonPolygon(new, func, arg)
+        deadline = _deadline(timeout, deadline)
+        # The scoped evaluation clears the definition in the same kernel call, so it does not leak to other users
+        # of the shared kernel.
+        new = self.kernel.evaluate(f'CompoundExpression[{wolfram_expr}, Expand[{self.wolfram_expr}]]',
+                                   'replacement', deadline=deadline, scoped=True)
+        return NewtonPolygon(new, func, arg, deadline=deadline, kernel=self.kernel)
 
     def draw(self, name=''):
         """!
@@ -649,15 +1082,45 @@ class NewtonPolygon(Polynomial):
         plt.title(name)
         plt.show()
 
+    def iter_points(self, fmt='text'):
+        """!
+        Iterate over lines of the listing of points used to initialize Newton polygon.
+        @param fmt str one of 'text', 'csv', 'jsonl'
+        @return generator of str objects
+        """
+        if fmt == 'text':
+            for i, point in enumerate(self._points):
+                yield f'Q{i} ({point[0]}, {point[1]}): ' + ''.join(f'{monomial} ' for monomial in point[2]) + '\n'
+        elif fmt == 'csv':
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            rows = ([f'Q{i}', point[0], point[1], ';'.join(str(m).strip() for m in point[2])]
+                    for i, point in enumerate(self._points))
+            for row in itertools.chain([['point', 'x', 'y', 'monomials']], rows):
+                writer.writerow(row)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        elif fmt == 'jsonl':
+            for i, point in enumerate(self._points):
+                yield json.dumps({'point': f'Q{i}', 'x': str(point[0]), 'y': str(point[1]),
+                                  'monomials': [str(m).strip() for m in point[2]]}) + '\n'
+        else:
+            raise ValueError("Passed format is not supported")
+
+    def write_points(self, stream, fmt='text'):
+        """!
+        Write points used to initialize Newton polygon to a file object.
+        @param stream file object with write method
+        @param fmt str one of 'text', 'csv', 'jsonl'
+        """
+        _write_chunks(stream, self.iter_points(fmt))
+
     def print_points(self):
         """!
         Print points used to initialize Newton polygon.
         """
-        for i in range(len(self._points)):
-            print(f'Q{i} ({self._points[i][0]}, {self._points[i][1]}):', end=' ')
-            for monomial in self._points[i][2]:
-                print(monomial.__str__(), end=' ')
-            print()
+        self.write_points(sys.stdout)
 
     def add_edge(self, point_index1: int, point_index2: int):
         """!
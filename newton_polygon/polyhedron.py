@@ -0,0 +1,356 @@
+import math
+from operator import mul
+
+from newton_polygon.polygon import Polynomial
+
+
+def _dot(a, b):
+    """!
+    Dot product of two integer vectors.
+    @param a tuple of int
+    @param b tuple of int
+    @return res int
+    """
+    return sum(map(mul, a, b))
+
+
+def _det(matrix):
+    """!
+    Fraction-free (Bareiss) determinant of a square integer matrix.
+    @param matrix list of lists of int
+    @return res int
+    """
+    m = [list(row) for row in matrix]
+    n = len(m)
+    if not n:
+        return 1
+    sign = 1
+    prev = 1
+    for k in range(n - 1):
+        if m[k][k] == 0:
+            for i in range(k + 1, n):
+                if m[i][k] != 0:
+                    m[k], m[i] = m[i], m[k]
+                    sign = -sign
+                    break
+            else:
+                return 0
+        for i in range(k + 1, n):
+            for j in range(k + 1, n):
+                m[i][j] = (m[i][j] * m[k][k] - m[i][k] * m[k][j]) // prev
+        prev = m[k][k]
+    return sign * m[n - 1][n - 1]
+
+
+def _integer_points(points):
+    """!
+    Scale rational points by the common denominator of their coordinates.
+    @param points list of tuples of Fraction objects
+    @return res list of tuples of int
+
+    >>> from newton_polygon.polygon import Fraction
+    >>> points = [(Fraction(0), Fraction(0)), (Fraction(1, 2), Fraction(1)), (Fraction(1), Fraction(2)),
+    ...           (Fraction(1), Fraction(0))]
+    >>> _integer_points(points)
+    [(0, 0), (1, 2), (2, 4), (2, 0)]
+
+    The point (1/2, 1) lies on the edge between (0, 0) and (1, 2):
+
+    >>> _convex_hull_faces(_integer_points(points))[1]
+    [(0, 1, 2), (0, 3), (2, 3)]
+    """
+    denominator = 1
+    for point in points:
+        for coord in point:
+            denominator = denominator * coord.b // math.gcd(denominator, coord.b)
+    return [tuple(coord.a * (denominator // coord.b) for coord in point) for point in points]
+
+
+def _affine_basis(points):
+    """!
+    Find affinely independent points spanning the affine hull of the given points and coordinates that
+    parametrize it. Extreme points are tried first, so that the first simplex of the hull is large.
+    @param points list of tuples of int
+    @return simplex list of point indexes
+    @return columns list of coordinate indexes
+    """
+    dim = len(points[0])
+    extremes = []
+    for i in range(dim):
+        extremes.append(min(range(len(points)), key=lambda p: points[p][i]))
+        extremes.append(max(range(len(points)), key=lambda p: points[p][i]))
+    base = extremes[0] if extremes else 0
+    simplex = [base]
+    rows = []
+    pivots = []
+    seen = set()
+    for p in extremes + list(range(len(points))):
+        if len(rows) == dim:
+            break
+        if p in seen:
+            continue
+        seen.add(p)
+        w = [x - y for x, y in zip(points[p], points[base])]
+        for row, pivot in zip(rows, pivots):
+            if w[pivot]:
+                w = [row[pivot] * x - w[pivot] * y for x, y in zip(w, row)]
+        g = 0
+        for x in w:
+            g = math.gcd(g, x)
+        if not g:
+            continue
+        w = [x // g for x in w]
+        rows.append(w)
+        pivots.append(next(i for i, x in enumerate(w) if x))
+        simplex.append(p)
+    return simplex, sorted(pivots)
+
+
+class _Facet:
+    """!
+    Simplicial facet of a convex hull under construction.
+    """
+
+    __slots__ = ('vertices', 'normal', 'offset', 'outside', 'coplanar', 'alive')
+
+    def __init__(self, vertices, normal, offset):
+        """!
+        _Facet initializer.
+        @param vertices frozenset of point indexes
+        @param normal tuple of int outward normal
+        @param offset int, points of the hull satisfy normal * x <= offset
+        """
+        self.vertices = vertices
+        self.normal = normal
+        self.offset = offset
+        self.outside = []
+        self.coplanar = []
+        self.alive = True
+
+
+def _hull_facets(points, simplex):
+    """!
+    Incremental (Quickhull) convex hull of full-dimensional integer points in exact arithmetic. Points lying on
+    the boundary are tracked, so every facet is returned with all the points on its hyperplane.
+    @param points list of tuples of int
+    @param simplex list of indexes of affinely independent points
+    @return facets dict of (normal, offset) to set of point indexes
+    """
+    dim = len(points[0])
+    interior = [sum(points[v][i] for v in simplex) for i in range(dim)]
+    scale = len(simplex)
+    ridges = {}
+
+    def add_facet(vertices):
+        """!
+        Create a facet through the given points, oriented away from the first simplex, and register its ridges.
+        @param vertices frozenset of point indexes
+        @return facet _Facet
+        """
+        ordered = sorted(vertices)
+        base = points[ordered[0]]
+        rows = [[x - y for x, y in zip(points[v], base)] for v in ordered[1:]]
+        normal = [(-1) ** j * _det([row[:j] + row[j + 1:] for row in rows]) for j in range(dim)]
+        g = 0
+        for x in normal:
+            g = math.gcd(g, x)
+        normal = [x // g for x in normal]
+        offset = _dot(normal, base)
+        if _dot(normal, interior) > scale * offset:
+            normal = [-x for x in normal]
+            offset = -offset
+        facet = _Facet(vertices, tuple(normal), offset)
+        for v in vertices:
+            ridges.setdefault(vertices - {v}, []).append(facet)
+        return facet
+
+    def partition(candidates, facets, inside=()):
+        """!
+        Assign candidates to the outside set of the first facet they are strictly above. Candidates above none of
+        the facets, and the inside points, which cannot be above any of them, are added to the coplanar set of
+        every facet whose hyperplane they lie on.
+        @param candidates list of point indexes
+        @param facets list of _Facet objects
+        @param inside list of point indexes lying inside the hull
+        """
+        for p in candidates:
+            coplanar = []
+            for facet in facets:
+                height = _dot(facet.normal, points[p]) - facet.offset
+                if height > 0:
+                    facet.outside.append(p)
+                    break
+                if height == 0:
+                    coplanar.append(facet)
+            else:
+                for facet in coplanar:
+                    facet.coplanar.append(p)
+        for p in inside:
+            for facet in facets:
+                if _dot(facet.normal, points[p]) == facet.offset:
+                    facet.coplanar.append(p)
+
+    vertices = frozenset(simplex)
+    facets = [add_facet(vertices - {v}) for v in simplex]
+    partition([p for p in range(len(points)) if p not in vertices], facets)
+
+    pending = [facet for facet in facets if facet.outside]
+    while pending:
+        facet = pending.pop()
+        if not facet.alive:
+            continue
+        apex = max(facet.outside, key=lambda p: _dot(facet.normal, points[p]))
+        point = points[apex]
+
+        visible = {facet}
+        hidden = set()
+        horizon = []
+        stack = [facet]
+        while stack:
+            current = stack.pop()
+            for v in current.vertices:
+                ridge = current.vertices - {v}
+                neighbour = ridges[ridge][0] if ridges[ridge][0] is not current else ridges[ridge][1]
+                if neighbour in visible:
+                    continue
+                if neighbour not in hidden and _dot(neighbour.normal, point) > neighbour.offset:
+                    visible.add(neighbour)
+                    stack.append(neighbour)
+                else:
+                    hidden.add(neighbour)
+                    horizon.append(ridge)
+
+        outside = []
+        inside = []
+        kept = set().union(*horizon)
+        for current in visible:
+            current.alive = False
+            for v in current.vertices:
+                ridge = current.vertices - {v}
+                ridges[ridge].remove(current)
+                if not ridges[ridge]:
+                    del ridges[ridge]
+                if v not in kept:
+                    inside.append(v)
+            outside.extend(p for p in current.outside if p != apex)
+            inside.extend(current.coplanar)
+
+        new = [add_facet(ridge | {apex}) for ridge in horizon]
+        partition(outside, new, [v for v in set(inside) if v != apex])
+        pending.extend(current for current in new if current.outside)
+
+    hyperplanes = {}
+    for current in {facet for facets in ridges.values() for facet in facets}:
+        hyperplanes.setdefault((current.normal, current.offset), set()).update(current.vertices, current.coplanar)
+    return hyperplanes
+
+
+def _convex_hull_faces(points):
+    """!
+    Compute faces of every dimension of the convex hull of distinct integer points.
+    @param points list of tuples of int
+    @return faces dict of dimension int to list of tuples of indexes of the points lying on the face
+
+    >>> faces = _convex_hull_faces([(x, y, z) for x in range(3) for y in range(3) for z in range(3)])
+    >>> {k: len(v) for k, v in faces.items()}
+    {3: 1, 2: 6, 1: 12, 0: 8}
+    >>> [len(face) for k in (2, 1, 0) for face in faces[k]] == [9] * 6 + [3] * 12 + [1] * 8
+    True
+    """
+    if not points:
+        return {}
+    simplex, columns = _affine_basis(points)
+    dim = len(columns)
+    faces = {dim: [frozenset(range(len(points)))]}
+    if dim:
+        projected = [tuple(point[i] for i in columns) for point in points]
+        facets = [frozenset(face) for face in _hull_facets(projected, simplex).values()]
+        incidence = {}
+        for i, facet in enumerate(facets):
+            for p in facet:
+                incidence.setdefault(p, []).append(i)
+        faces[dim - 1] = facets
+        for k in range(dim - 1, 0, -1):
+            lower = set()
+            for face in faces[k]:
+                candidates = set()
+                for i in {i for p in face for i in incidence[p]}:
+                    intersection = face & facets[i]
+                    if intersection != face:
+                        candidates.add(intersection)
+                maximal = []
+                for candidate in sorted(candidates, key=len, reverse=True):
+                    if not any(candidate <= other for other in maximal):
+                        maximal.append(candidate)
+                lower.update(maximal)
+            faces[k - 1] = list(lower)
+    return {k: sorted(tuple(sorted(face)) for face in level) for k, level in faces.items()}
+
+
+class NewtonPolyhedron(Polynomial):
+    """!
+    Class for handling Newton polyhedra of differential polynomials in several functions and arguments.
+    """
+
+    def __init__(self, wolfram_expr: str, funcs: list, args: list, timeout=None, deadline=None, kernel=None):
+        """!
+        Newton Polyhedron initializer. The points are exponent vectors of the arguments followed by the powers of
+        the functions, see Monomial.get_vector.
+        @param wolfram_expr str
+        @param funcs list of str
+        @param args list of str
+        @param timeout float seconds or None
+        @param deadline float time.monotonic() value or None
+        @param kernel Kernel, the shared default kernel if None
+        """
+        super().__init__(wolfram_expr, timeout, deadline, kernel)
+        if type(funcs) != list or type(args) != list:
+            raise ValueError("Passed functions or arguments are not a list")
+        self.functions = funcs
+        self.arguments = args
+        self._points = []
+        index = {}
+        for monomial in self.monomial_list:
+            point = monomial.get_vector(funcs, args)
+            if point in index:
+                self._points[index[point]][1].append(monomial)
+            else:
+                index[point] = len(self._points)
+                self._points.append([point, [monomial]])
+        self.faces = _convex_hull_faces(_integer_points([point[0] for point in self._points]))
+        self.dimension = max(self.faces) if self.faces else -1
+
+    def get_points(self):
+        """!
+        Get points used to initialize Newton polyhedron.
+        @return res list of tuples of Fraction objects
+        """
+        return [point[0] for point in self._points]
+
+    def get_vertices(self):
+        """!
+        Get indexes of the points which are vertices of Newton polyhedron.
+        @return res list of int
+        """
+        return [face[0] for face in self.faces.get(0, [])]
+
+    def get_faces(self, dim: int):
+        """!
+        Get faces of the given dimension, each one as a tuple of indexes of the points lying on it.
+        @param dim int
+        @return res list of tuples of int
+        """
+        if type(dim) != int:
+            raise ValueError("Passed dimension is not int")
+        return self.faces.get(dim, [])
+
+    def get_monomials(self, face):
+        """!
+        Get monomials whose points lie on the given face, i.e. the truncation of the polynomial on the face.
+        @param face tuple of int
+        @return res list of Monomial objects
+        """
+        for i in face:
+            if type(i) != int or i >= len(self._points) or i < 0:
+                raise ValueError("Passed face is not valid")
+        return [monomial for i in face for monomial in self._points[i][1]]